@@ -0,0 +1,185 @@
+"""
+数据源查询结果缓存。
+
+两级缓存，键为 (函数名, 参数 JSON)：
+- 进程内：LRU 字典 + 单调时钟时间桶，TTL 内重复调用直接命中
+- 磁盘：~/.cache/asset_query 下的 pickle 文件，跨 CLI 调用复用
+  （如先后执行 inventory --format table 与 --format csv）
+
+可通过环境变量 ASSET_QUERY_CACHE_DIR 修改缓存目录。
+CLI 的 --no-cache 参数调用 disable() 关闭缓存，
+--refresh 参数调用 clear_all() 丢弃已有缓存并重新拉取。
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+from types import MappingProxyType
+
+CACHE_DIR = Path(os.environ.get("ASSET_QUERY_CACHE_DIR", "~/.cache/asset_query")).expanduser()
+
+# 可缓存结果的最大条数：迭代器超过后不再记录、不缓存，流式调用方的内存占用与结果规模无关；
+# 直接返回的 list 超过该条数同样不缓存
+MAX_RECORDED_ROWS = 10_000
+
+_enabled = True
+_MISS = object()
+_registry = []
+
+
+def disable():
+    """关闭缓存（读写均跳过），用于 --no-cache。"""
+    global _enabled
+    _enabled = False
+
+
+def clear_all():
+    """清空所有 @ttl_cache 函数的进程内与磁盘缓存，用于 --refresh。"""
+    for fn in _registry:
+        fn.cache_clear()
+
+
+def ttl_cache(seconds: int = 300, maxsize: int = 128):
+    """
+    为数据源函数添加 TTL 缓存。
+
+    数据源抛出的异常（包括 NotImplementedError）不会被缓存；返回 None（如单台查询未找到）
+    也不缓存，新登记的资产下次查询即可查到。
+    返回迭代器 / 生成器的函数，未命中时结果照常流式返回给调用方，
+    边迭代边记录，完整迭代结束后才写入缓存（中途停止或超过 MAX_RECORDED_ROWS 条则不缓存）；
+    命中时返回 list。返回 list 的函数，超过 MAX_RECORDED_ROWS 条时同样不缓存。
+    返回单条 dict 的函数，调用方拿到的是只读的 MappingProxyType，
+    避免修改共享的缓存对象。
+    被装饰函数新增 cache_clear()，同时清空进程内与磁盘缓存。
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+        memo = OrderedDict()
+        lock = threading.Lock()
+        pruned = False
+
+        def store(mkey, key, value):
+            nonlocal pruned
+            if value is None or (isinstance(value, list) and len(value) > MAX_RECORDED_ROWS):
+                return
+            if not pruned:
+                # 每个进程每个函数清理一次过期的磁盘缓存（如按 asset_id 累积的单台查询）
+                pruned = True
+                _disk_prune(fn.__name__, seconds)
+            _disk_put(fn.__name__, key, value)
+            remember(mkey, value)
+
+        def remember(mkey, value):
+            with lock:
+                memo[mkey] = value
+                memo.move_to_end(mkey)
+                while len(memo) > maxsize:
+                    memo.popitem(last=False)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps(bound.arguments, sort_keys=True, ensure_ascii=False, default=str)
+            mkey = (int(time.monotonic() // seconds), key)
+
+            with lock:
+                value = memo.get(mkey, _MISS)
+                if value is not _MISS:
+                    memo.move_to_end(mkey)
+            if value is _MISS:
+                value = _disk_get(fn.__name__, key, seconds)
+                if value is _MISS:
+                    # JSON 只用作缓存键，数据源收到的是调用方的原始参数
+                    value = fn(*bound.args, **bound.kwargs)
+                    if isinstance(value, Iterator):
+                        return _record(value, lambda rows: store(mkey, key, rows))
+                    store(mkey, key, value)
+                else:
+                    # 磁盘命中只放入进程内缓存；重写文件会刷新 mtime，使条目永不过期
+                    remember(mkey, value)
+            return MappingProxyType(value) if isinstance(value, dict) else value
+
+        def cache_clear():
+            with lock:
+                memo.clear()
+            for path in CACHE_DIR.glob(f"{fn.__name__}-*.pickle"):
+                path.unlink(missing_ok=True)
+
+        wrapper.cache_clear = cache_clear
+        _registry.append(wrapper)
+        return wrapper
+    return decorator
+
+
+def _record(items, on_complete):
+    """
+    原样转发迭代器的元素，完整迭代结束后把全部元素以 list 交给 on_complete。
+
+    超过 MAX_RECORDED_ROWS 条时丢弃已记录的元素并停止记录（结果不缓存）。
+    """
+    rows = []
+    for item in items:
+        if rows is not None:
+            rows.append(item)
+            if len(rows) > MAX_RECORDED_ROWS:
+                rows = None
+        yield item
+    if rows is not None:
+        on_complete(rows)
+
+
+def _disk_path(name, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{name}-{digest}.pickle"
+
+
+def _disk_get(name, key, seconds):
+    """读取未过期的磁盘缓存，缺失、过期或损坏时返回 _MISS。"""
+    path = _disk_path(name, key)
+    try:
+        if time.time() - path.stat().st_mtime > seconds:
+            path.unlink(missing_ok=True)
+            return _MISS
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return _MISS
+
+
+def _disk_prune(name, seconds):
+    """删除该函数已过期的磁盘缓存文件。"""
+    now = time.time()
+    for path in CACHE_DIR.glob(f"{name}-*.pickle"):
+        try:
+            if now - path.stat().st_mtime > seconds:
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def _disk_put(name, key, value):
+    """原子写入磁盘缓存；缓存目录不可写时静默跳过。"""
+    import tempfile
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _disk_path(name, key))
+    except (OSError, TypeError, pickle.PicklingError):
+        Path(tmp).unlink(missing_ok=True)
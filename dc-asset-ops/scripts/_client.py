@@ -0,0 +1,83 @@
+"""
+CMDB HTTP 客户端。
+
+进程内共享一个带连接池的 requests.Session：所有 fetch_* 复用同一组
+keep-alive 连接，避免每次请求重新进行 TCP / TLS 握手。
+
+环境变量：
+- CMDB_BASE_URL: CMDB API 地址，如 https://cmdb.example.com
+- CMDB_TOKEN:    可选，Bearer Token
+
+依赖：
+    pip install requests
+"""
+
+import os
+import threading
+
+CMDB_BASE_URL = os.environ.get("CMDB_BASE_URL", "").rstrip("/")
+CMDB_TOKEN = os.environ.get("CMDB_TOKEN", "")
+
+# (连接超时, 读取超时)，单位秒
+TIMEOUT = (3.05, 30)
+
+# POOL_CONNECTIONS：缓存连接池的主机数（每个 host 一个池），CMDB 通常只有一个 host
+# POOL_MAXSIZE：单个 host 可保持的连接数，应不小于 asset_query.MAX_CONCURRENCY，
+#               否则超出部分的连接用完即关闭，并发请求重新握手
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 50
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """返回进程内共享的 Session（首次调用时创建）。"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+
+def api_get(path: str, **params):
+    """GET {CMDB_BASE_URL}{path}，值为 None 的参数不发送，返回解析后的 JSON。"""
+    resp = get_session().get(
+        _url(path),
+        params={k: v for k, v in params.items() if v is not None},
+        timeout=TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def api_post(path: str, payload):
+    """POST JSON 到 {CMDB_BASE_URL}{path}（如批量接口 :batchGet），返回解析后的 JSON。"""
+    resp = get_session().post(_url(path), json=payload, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _url(path):
+    if not CMDB_BASE_URL:
+        raise RuntimeError("未配置 CMDB 地址，请设置环境变量 CMDB_BASE_URL")
+    return CMDB_BASE_URL + path
+
+
+def _new_session():
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+    except ImportError:
+        raise ImportError("CMDB HTTP 客户端需要 requests，请执行: pip install requests") from None
+
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if CMDB_TOKEN:
+        session.headers["Authorization"] = f"Bearer {CMDB_TOKEN}"
+    return session
@@ -0,0 +1,216 @@
+"""
+服务器数据本地列式镜像（Parquet / Arrow）。
+
+`asset_query.py sync` 把数据源中的全量服务器写入 ~/.cache/asset_query/servers.parquet，
+之后 inventory / summary / search 加 --local 即在本地 Arrow 表上做向量化过滤与聚合，
+不访问数据源。字符串列以字典编码存储，体积远小于逐条 dict。
+
+sync 同时生成 SQLite FTS5 trigram 索引（search.db），search --local 按关键词
+直接查索引得到命中行，不再逐行扫描四个字段；关键词不足 3 个字符、
+SQLite 不支持 trigram 或索引比镜像旧时，回退为 Arrow 子串扫描。
+为让回退扫描也只需一趟，sync 预先把四个搜索字段小写后拼成一列 _search_text，
+扫描时对该列做一次区分大小写的子串匹配（无需正则 / 大小写折叠）。
+
+建议用 cron 每晚同步一次，如：
+    0 2 * * * python /path/to/asset_query.py sync
+
+依赖：
+    pip install pyarrow
+"""
+
+import os
+
+from _cache import CACHE_DIR
+
+MIRROR_PATH = CACHE_DIR / "servers.parquet"
+SEARCH_INDEX_PATH = CACHE_DIR / "search.db"
+
+# search 匹配的字段
+SEARCH_FIELDS = ("asset_id", "sn", "hostname", "mgmt_ip")
+
+# sync 时预计算的搜索列：SEARCH_FIELDS 小写后以 \x1f 拼接（分隔符保证匹配不跨字段）
+SEARCH_TEXT_COLUMN = "_search_text"
+
+
+class MirrorError(RuntimeError):
+    """本地镜像不可用（未安装 pyarrow 或尚未同步）。"""
+
+
+def sync(servers) -> int:
+    """把服务器记录写入本地镜像（先写临时文件再原子替换），返回写入条数。"""
+    _, _, pq = _pyarrow()
+    servers = list(servers)
+    table = _to_table(servers)
+    table = table.append_column(SEARCH_TEXT_COLUMN, _search_text(table))
+    MIRROR_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MIRROR_PATH.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp, use_dictionary=True)
+    os.replace(tmp, MIRROR_PATH)
+    _write_search_index(servers)
+    return table.num_rows
+
+
+def filter_servers(dc_name=None, status=None) -> list[dict]:
+    """按数据中心 / 状态过滤，语义同 fetch_all_servers()。"""
+    _, pc, _ = _pyarrow()
+    table = _load()
+    mask = None
+    for col, value in (("dc_name", dc_name), ("status", status)):
+        if value is None:
+            continue
+        cond = pc.equal(_column(table, col), value)
+        mask = cond if mask is None else pc.and_(mask, cond)
+    if mask is not None:
+        table = table.filter(mask)
+    return _rows(table)
+
+
+def count_by(dc_name, dims) -> dict[str, dict]:
+    """按维度分组计数，返回格式同 fetch_summary_counts()。"""
+    pa, pc, _ = _pyarrow()
+    table = _load()
+    if dc_name is not None:
+        table = table.filter(pc.equal(_column(table, "dc_name"), dc_name))
+    counts = {}
+    for d in dims:
+        # 与数据源路径一致：缺失、null 与空串都计为 unknown
+        col = _column(table, d)
+        col = pc.if_else(pc.equal(col, ""), pa.scalar(None, pa.string()), col)
+        vc = pc.value_counts(pc.fill_null(col, "unknown"))
+        counts[d] = dict(zip(vc.field("values").to_pylist(), vc.field("counts").to_pylist()))
+    return counts
+
+
+def search(keyword) -> list[dict]:
+    """在 SEARCH_FIELDS 上做不区分大小写的子串匹配，语义同 search_servers()。"""
+    pa, pc, _ = _pyarrow()
+    table = _load()
+    rows = _search_index(keyword)
+    if rows is not None:
+        return _rows(table.take(pa.array(rows, pa.int64())))
+
+    if SEARCH_TEXT_COLUMN in table.column_names:
+        mask = pc.match_substring(table[SEARCH_TEXT_COLUMN], keyword.lower())
+    else:
+        # sync 早于 _search_text 列引入的旧镜像：逐字段匹配
+        mask = None
+        for col in SEARCH_FIELDS:
+            cond = pc.fill_null(pc.match_substring(_column(table, col), keyword, ignore_case=True), False)
+            mask = cond if mask is None else pc.or_(mask, cond)
+    return _rows(table.filter(mask))
+
+
+def _to_table(servers):
+    """
+    记录列表转为 Arrow 表。
+
+    列取所有记录字段的并集（Table.from_pylist 只按第一条记录推断 schema，会丢掉其后才出现的字段），
+    每列的类型由该列全部取值推断；同一字段混有数字与字符串等标量时整列按字符串存储。
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for name in dict.fromkeys(k for s in servers for k in s):
+        values = [s.get(name) for s in servers]
+        try:
+            columns[name] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if not all(v is None or isinstance(v, (str, int, float, bool)) for v in values):
+                raise MirrorError(f"字段 {name} 的取值类型不一致，无法写入本地镜像") from None
+            columns[name] = pa.array([None if v is None else str(v) for v in values], pa.string())
+    return pa.table(columns)
+
+
+def _search_text(table):
+    """拼接 SEARCH_FIELDS 为一列小写文本（缺失字段按空串）。"""
+    _, pc, _ = _pyarrow()
+    cols = [pc.fill_null(_column(table, f), "") for f in SEARCH_FIELDS]
+    return pc.utf8_lower(pc.binary_join_element_wise(*cols, "\x1f"))
+
+
+def _write_search_index(servers):
+    """
+    生成 trigram 全文索引，rowid 即镜像中的行号。
+
+    SQLite 未编译 FTS5 / trigram（< 3.34）时删除旧索引，search 回退为扫描。
+    """
+    import sqlite3
+
+    tmp = SEARCH_INDEX_PATH.with_suffix(".db.tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    try:
+        with con:
+            con.execute(
+                f"CREATE VIRTUAL TABLE servers_fts USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='trigram')"
+            )
+            con.executemany(
+                f"INSERT INTO servers_fts (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (?{', ?' * len(SEARCH_FIELDS)})",
+                ((i, *(str(s.get(f) or "") for f in SEARCH_FIELDS)) for i, s in enumerate(servers)),
+            )
+    except sqlite3.OperationalError:
+        con.close()
+        tmp.unlink(missing_ok=True)
+        SEARCH_INDEX_PATH.unlink(missing_ok=True)
+        return
+    con.close()
+    os.replace(tmp, SEARCH_INDEX_PATH)
+
+
+def _search_index(keyword):
+    """查 trigram 索引，返回命中的行号列表；索引不可用时返回 None。"""
+    # trigram 分词只能为不少于 3 个字符的子串提供索引
+    if len(keyword) < 3:
+        return None
+    # sqlite3 只在 sync / search --local 时导入：_mirror 随每条命令加载
+    import sqlite3
+
+    try:
+        if SEARCH_INDEX_PATH.stat().st_mtime < MIRROR_PATH.stat().st_mtime:
+            return None
+    except OSError:
+        return None
+    con = sqlite3.connect(f"file:{SEARCH_INDEX_PATH}?mode=ro", uri=True)
+    try:
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        cur = con.execute("SELECT rowid FROM servers_fts WHERE servers_fts MATCH ? ORDER BY rowid", (phrase,))
+        return [r[0] for r in cur]
+    except sqlite3.Error:
+        return None
+    finally:
+        con.close()
+
+
+def _rows(table):
+    """转回 list[dict]；Parquet 以 null 补齐的缺失字段不放入 dict，与数据源返回保持一致。"""
+    table = table.select([c for c in table.column_names if c != SEARCH_TEXT_COLUMN])
+    return [{k: v for k, v in row.items() if v is not None} for row in table.to_pylist()]
+
+
+def _column(table, name):
+    """取字符串列；镜像中不存在的字段视为全部缺失。"""
+    import pyarrow as pa
+
+    if name not in table.column_names:
+        return pa.nulls(table.num_rows, pa.string())
+    col = table[name]
+    if not pa.types.is_string(col.type):
+        col = col.cast(pa.string())
+    return col
+
+
+def _load():
+    _, _, pq = _pyarrow()
+    if not MIRROR_PATH.exists():
+        raise MirrorError(f"本地镜像不存在: {MIRROR_PATH}，请先执行: python asset_query.py sync")
+    return pq.read_table(MIRROR_PATH)
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise MirrorError("本地镜像需要 pyarrow，请执行: pip install pyarrow") from None
+    return pa, pc, pq
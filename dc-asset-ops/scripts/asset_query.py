@@ -6,35 +6,77 @@
 数据源部分为接口占位，需对接实际 CMDB / 数据库 / API 后使用。
 
 Usage:
-    python asset_query.py inventory [--dc <dc_name>] [--status <status>] [--format json|csv|table]
-    python asset_query.py summary [--dc <dc_name>]
+    python asset_query.py inventory [--dc <dc_name>] [--status <status>] [--format json|csv|table] [--local]
+    python asset_query.py summary [--dc <dc_name>] [--local]
     python asset_query.py rack <rack_id>
-    python asset_query.py warranty [--days <days>]
-    python asset_query.py search <keyword>
-    python asset_query.py lifecycle <asset_id>
+    python asset_query.py warranty [--days <days>] [--limit <n>]
+    python asset_query.py search <keyword> [--local]
+    python asset_query.py lifecycle <asset_id> [<asset_id> ...]
+    python asset_query.py sync
+
+    --local 从本地 Parquet 镜像查询（先执行 sync 生成），见 _mirror.py。
+
+    任意命令可附加 --no-cache 跳过查询缓存，或 --refresh 丢弃缓存重新拉取。
 """
 
+# 仅个别命令用到的模块（csv / concurrent.futures / _mirror 所需的 pyarrow、sqlite3 及可选的 orjson）
+# 在使用处导入，其余命令不承担其导入开销。
+# json / pickle / hashlib（_cache）与 inspect（dataclasses）每条命令都会加载，直接在顶层导入。
+import argparse
+import dataclasses
+import functools
+import heapq
+import itertools
 import json
+import operator
 import sys
-from datetime import datetime, timedelta
-from typing import Optional
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+
+import _cache
+import _mirror
+from _cache import ttl_cache
+
+# 批量接口单次请求的最大 asset_id 数（SQL IN 参数个数 / API 请求体大小限制）
+BULK_CHUNK_SIZE = 1000
+
+# 并发数据源请求上限（应不超过 CMDB 连接池 / 限流配置）
+MAX_CONCURRENCY = 20
+
+# 分页拉取服务器列表时每页条数
+PAGE_SIZE = 1000
+
+# summary 的统计维度
+SUMMARY_DIMS = ("status", "model", "dc_name", "purpose")
+
+# 分组计数时每批处理的记录数（流式统计的内存只占一批）
+COUNT_BATCH_SIZE = 5000
+
+# warranty 命令实际用到的字段（投影下推给数据源）
+WARRANTY_FIELDS = ("asset_id", "hostname", "warranty_expire", "vendor_contract")
 
 
 # ============================================================
 # 数据源接口（留空 — 对接实际系统时实现以下函数）
+# 带 @ttl_cache 的函数结果缓存 5 分钟（进程内 + 磁盘），见 _cache.py
+# 走 HTTP 对接 CMDB 时使用 _client.api_get / api_post（共享连接池），见 _client.py
 # ============================================================
 
-def fetch_all_servers(dc_name: Optional[str] = None, status: Optional[str] = None) -> list[dict]:
+@ttl_cache(seconds=300)
+def fetch_all_servers(dc_name: Optional[str] = None, status: Optional[str] = None) -> Iterator[dict]:
     """
-    获取服务器列表。
+    获取服务器列表（流式：写成生成器逐页 yield，调用方边收边输出 / 统计）。
 
     对接建议：
-    - CMDB API: GET /api/v1/servers?dc={dc_name}&status={status}
+    - CMDB API: 分页 GET /api/v1/servers?dc={dc_name}&status={status}&page={n}&size={PAGE_SIZE}
+                每页 yield from _client.api_get("/api/v1/servers", dc=dc_name, status=status,
+                                                page=n, size=PAGE_SIZE)，直到返回空页
     - 数据库: SELECT * FROM servers WHERE dc_name = ? AND status = ?
-    - Excel/CSV: pandas.read_csv('assets.csv') 后过滤
+              服务端游标 cursor.fetchmany(PAGE_SIZE) 逐批 yield from
+    - Excel/CSV: pandas.read_csv('assets.csv', chunksize=PAGE_SIZE) 逐块过滤后 yield
 
     Returns:
-        list[dict]: 服务器记录列表，每条记录字段参考 references/asset_schema.md
+        Iterator[dict]: 服务器记录（返回 list 亦可），每条记录字段参考 references/asset_schema.md
     """
     # TODO: 对接实际数据源
     raise NotImplementedError(
@@ -43,6 +85,7 @@ def fetch_all_servers(dc_name: Optional[str] = None, status: Optional[str] = Non
     )
 
 
+@ttl_cache(seconds=300, maxsize=4096)  # lifecycle 等按编号反复钻取单台设备
 def fetch_server_by_id(asset_id: str) -> Optional[dict]:
     """
     根据资产编号获取单台服务器详情。
@@ -60,6 +103,7 @@ def fetch_server_by_id(asset_id: str) -> Optional[dict]:
     )
 
 
+@ttl_cache(seconds=300)
 def fetch_servers_by_rack(rack_id: str) -> list[dict]:
     """
     获取指定机柜内所有服务器，按 U 位排序。
@@ -77,17 +121,26 @@ def fetch_servers_by_rack(rack_id: str) -> list[dict]:
     )
 
 
-def fetch_warranty_expiring(days: int = 90) -> list[dict]:
+@ttl_cache(seconds=300)
+def fetch_warranty_expiring(days: int = 90,
+                            fields: Optional[tuple] = WARRANTY_FIELDS,
+                            limit: Optional[int] = None) -> Iterable[dict]:
     """
-    获取即将过保的服务器（未来 N 天内到期）。
+    获取即将过保的服务器（未来 N 天内到期），按到期日升序。
 
     对接建议：
-    - 数据库: SELECT * FROM servers
+    - 数据库: SELECT asset_id, hostname, warranty_expire, vendor_contract FROM servers
               WHERE warranty_expire BETWEEN NOW() AND NOW() + INTERVAL ? DAY
-              ORDER BY warranty_expire
+              ORDER BY warranty_expire [LIMIT ?]
+              只查询 fields 中的列；可用服务端游标逐批 yield，内存占用与结果集大小无关
+    - CMDB API: GET /api/v1/servers/warranty?days={days}&fields=asset_id,hostname,...&limit={limit}
+
+    Args:
+        fields: 需要返回的字段，None 表示全部字段
+        limit: 最多返回条数，None 表示不限
 
     Returns:
-        list[dict]: 即将过保的服务器列表
+        Iterable[dict]: 即将过保的服务器记录（可为生成器）
     """
     # TODO: 对接实际数据源
     raise NotImplementedError(
@@ -103,6 +156,9 @@ def search_servers(keyword: str) -> list[dict]:
     - CMDB API: GET /api/v1/servers/search?q={keyword}
     - 数据库: SELECT * FROM servers
               WHERE asset_id LIKE ? OR sn LIKE ? OR hostname LIKE ? OR mgmt_ip LIKE ?
+              '%kw%' 无法走普通索引，机群较大时建议建 trigram 索引
+              （PostgreSQL pg_trgm、SQLite FTS5 tokenize='trigram'）
+    - 本地镜像: search --local 使用 sync 生成的 trigram 索引，见 _mirror.py
 
     Returns:
         list[dict]: 匹配的服务器列表
@@ -131,50 +187,151 @@ def fetch_lifecycle_events(asset_id: str) -> list[dict]:
     )
 
 
+def fetch_servers_bulk(asset_ids: list[str]) -> dict[str, dict]:
+    """
+    批量获取多台服务器详情（一次请求代替 N 次 fetch_server_by_id）。
+
+    对接建议：
+    - CMDB API: POST /api/v1/servers:batchGet  body: {"asset_ids": [...]}
+                即 _client.api_post("/api/v1/servers:batchGet", {"asset_ids": chunk})
+    - 数据库: SELECT * FROM servers WHERE asset_id IN (?, ?, ...)
+              按 BULK_CHUNK_SIZE 分批，避免超出 SQL 参数个数上限
+
+    Returns:
+        dict[str, dict]: {asset_id: 服务器记录}，未找到的资产不出现在结果中
+    """
+    # TODO: 对接实际数据源
+    raise NotImplementedError(
+        "请实现 fetch_servers_bulk()，对接 CMDB / 数据库 / API。"
+    )
+
+
+def fetch_lifecycle_bulk(asset_ids: list[str]) -> dict[str, list[dict]]:
+    """
+    批量获取多台服务器的生命周期事件（一次请求代替 N 次 fetch_lifecycle_events）。
+
+    对接建议：
+    - CMDB API: POST /api/v1/lifecycle:batchGet  body: {"asset_ids": [...]}
+    - 数据库: SELECT * FROM lifecycle_events WHERE asset_id IN (?, ?, ...)
+              ORDER BY asset_id, event_time
+              按 BULK_CHUNK_SIZE 分批
+
+    Returns:
+        dict[str, list[dict]]: {asset_id: 事件列表}，格式同 fetch_lifecycle_events()
+    """
+    # TODO: 对接实际数据源
+    raise NotImplementedError(
+        "请实现 fetch_lifecycle_bulk()，对接 CMDB / 数据库 / API。"
+    )
+
+
+@ttl_cache(seconds=300)
+def fetch_summary_counts(dc_name: Optional[str] = None,
+                         dims: tuple = SUMMARY_DIMS) -> dict[str, dict[str, int]]:
+    """
+    按维度分组计数（把聚合下推到数据源，只传输统计结果而不是全部记录）。
+
+    对接建议：
+    - 数据库: SELECT status, COUNT(*) FROM servers [WHERE dc_name = ?] GROUP BY status
+              每个维度一条，或合并为一条 GROUP BY GROUPING SETS ((status), (model), ...)
+    - CMDB API: GET /api/v1/servers/stats?dc={dc_name}&group_by=status,model,dc_name,purpose
+
+    默认实现流式拉取全部服务器后在本地计数（绕过 fetch_all_servers 的缓存，只缓存计数结果），
+    数据源支持聚合时建议替换。
+
+    Returns:
+        dict[str, dict[str, int]]: {维度: {取值: 数量}}，缺失值计为 unknown
+    """
+    return _count_by(fetch_all_servers.__wrapped__(dc_name=dc_name), dims)
+
+
 # ============================================================
 # 业务逻辑（基于数据源接口构建，无需修改）
 # ============================================================
 
-def cmd_inventory(dc_name=None, status=None, fmt="table"):
+@dataclasses.dataclass(slots=True, frozen=True)
+class Server:
+    """
+    各命令渲染用到的服务器字段（字段定义见 references/asset_schema.md）。
+
+    取数后用 Server.from_record() 转换一次：缺失字段补缺省值，
+    slots 布局比 dict 省内存，渲染时按属性取值，不再逐字段 .get(k, default)。
+    """
+    asset_id: str = ""
+    sn: str = ""
+    hostname: str = ""
+    model: str = ""
+    status: str = ""
+    purpose: str = ""
+    dc_name: str = ""
+    rack_id: str = ""
+    u_start: int | str = ""
+    u_height: int = 1
+    mgmt_ip: str = ""
+    warranty_expire: str = ""
+    vendor_contract: str = ""
+    asset_owner: str = ""
+    business_unit: str = ""
+
+    @classmethod
+    def from_record(cls, raw) -> "Server":
+        """从数据源返回的 dict 构造，忽略 Server 未定义的字段。"""
+        return cls(*map(raw.get, _SERVER_FIELDS, _SERVER_DEFAULTS))
+
+
+_SERVER_FIELDS = tuple(f.name for f in dataclasses.fields(Server))
+_SERVER_DEFAULTS = tuple(f.default for f in dataclasses.fields(Server))
+
+# 逐行输出的字段投影与行模板：attrgetter 一次取出整行字段，交给预绑定的 str.format
+_TABLE_GET = operator.attrgetter("asset_id", "hostname", "model", "status", "dc_name", "rack_id", "u_start")
+_TABLE_ROW = "  {:<14s}  {:<20s}  {:<20s}  {:<8s}  {} {} U{}".format
+
+_WARRANTY_GET = operator.attrgetter("asset_id", "hostname", "warranty_expire", "vendor_contract")
+_WARRANTY_ROW = "  {:<14s}  {:<20s}  过保: {}  合同: {}".format
+
+_RACK_GET = operator.attrgetter("status", "asset_id", "hostname", "model")
+_RACK_ROW = "{:>5s}  {:<6s}  {:<14s}  {:<20s}  {}".format
+
+
+def cmd_inventory(dc_name=None, status=None, fmt="table", local=False):
     """资产清单查询。"""
-    servers = fetch_all_servers(dc_name=dc_name, status=status)
+    if local:
+        servers = _mirror.filter_servers(dc_name=dc_name, status=status)
+    else:
+        servers = fetch_all_servers(dc_name=dc_name, status=status)
+    # 记录边到达边输出，总数在输出结束后才知道
+    servers = _Counted(servers)
     if fmt == "json":
-        print(json.dumps(servers, indent=2, ensure_ascii=False, default=str))
+        _write_json(servers)
     elif fmt == "csv":
-        if not servers:
+        import csv
+
+        keys = ["asset_id", "sn", "hostname", "model", "status", "dc_name", "rack_id", "u_start", "mgmt_ip"]
+        get = operator.attrgetter(*keys)
+        rows = (get(Server.from_record(s)) for s in servers)
+        first = next(rows, None)
+        if first is None:
             print("无记录")
             return
-        keys = ["asset_id", "sn", "hostname", "model", "status", "dc_name", "rack_id", "u_start", "mgmt_ip"]
-        print(",".join(keys))
-        for s in servers:
-            print(",".join(str(s.get(k, "")) for k in keys))
+        # csv.writer 负责引号转义（字段中含逗号 / 引号时仍是合法 CSV）
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(keys)
+        writer.writerow(first)
+        writer.writerows(rows)
     else:
-        _print_server_table(servers)
-    print(f"\n共 {len(servers)} 台服务器", file=sys.stderr)
+        _print_server_table(Server.from_record(s) for s in servers)
+    print(f"\n共 {servers.count} 台服务器", file=sys.stderr)
 
 
-def cmd_summary(dc_name=None):
+def cmd_summary(dc_name=None, local=False):
     """资产统计摘要。"""
-    servers = fetch_all_servers(dc_name=dc_name)
-
-    total = len(servers)
-    by_status = {}
-    by_model = {}
-    by_dc = {}
-    by_purpose = {}
-
-    for s in servers:
-        st = s.get("status", "unknown")
-        by_status[st] = by_status.get(st, 0) + 1
-
-        model = s.get("model", "unknown")
-        by_model[model] = by_model.get(model, 0) + 1
-
-        dc = s.get("dc_name", "unknown")
-        by_dc[dc] = by_dc.get(dc, 0) + 1
-
-        purpose = s.get("purpose", "unknown")
-        by_purpose[purpose] = by_purpose.get(purpose, 0) + 1
+    if local:
+        counts = _mirror.count_by(dc_name, SUMMARY_DIMS)
+    else:
+        counts = fetch_summary_counts(dc_name=dc_name, dims=SUMMARY_DIMS)
+    by_status, by_model, by_dc, by_purpose = (counts[d] for d in SUMMARY_DIMS)
+    total = sum(by_status.values())
+    by_count = operator.itemgetter(1)
 
     print(f"=== 资产统计摘要 ===")
     if dc_name:
@@ -187,96 +344,117 @@ def cmd_summary(dc_name=None):
         print(f"  {k:<20s} {v:>5d}  ({pct:.1f}%)")
 
     print("\n--- 按用途 ---")
-    for k, v in sorted(by_purpose.items(), key=lambda x: -x[1]):
+    for k, v in sorted(by_purpose.items(), key=by_count, reverse=True):
         print(f"  {k:<20s} {v:>5d}")
 
     print("\n--- 按型号 (Top 10) ---")
-    for k, v in sorted(by_model.items(), key=lambda x: -x[1])[:10]:
+    # 型号种类可能很多，只需 Top 10：堆选择 O(N log 10)，无需全量排序
+    for k, v in heapq.nlargest(10, by_model.items(), key=by_count):
         print(f"  {k:<30s} {v:>5d}")
 
     print("\n--- 按数据中心 ---")
-    for k, v in sorted(by_dc.items(), key=lambda x: -x[1]):
+    for k, v in sorted(by_dc.items(), key=by_count, reverse=True):
         print(f"  {k:<20s} {v:>5d}")
 
 
 def cmd_rack(rack_id):
     """机柜视图 — 显示机柜内服务器分布。"""
-    servers = fetch_servers_by_rack(rack_id)
+    servers = [Server.from_record(s) for s in fetch_servers_by_rack(rack_id)]
 
     print(f"=== 机柜 {rack_id} ===")
     if not servers:
         print("  (空)")
         return
 
-    # 构建 U 位占用映射
+    # 构建 U 位占用映射：下标即 U 位（1..max_u），未占用为 None
     max_u = 42  # 标准 42U 机柜
-    u_map = {}
+    u_map = [None] * (max_u + 1)
     for s in servers:
-        u_start = s.get("u_start", 0)
-        u_height = s.get("u_height", 1)
-        for u in range(u_start, u_start + u_height):
+        u_start = s.u_start or 0
+        u_height = s.u_height
+        for u in range(max(u_start, 1), min(u_start + u_height, max_u + 1)):
             u_map[u] = s
 
     print(f"{'U':>3s}  {'状态':<6s}  {'资产编号':<14s}  {'主机名':<20s}  {'型号'}")
     print("-" * 75)
     for u in range(max_u, 0, -1):
-        if u in u_map:
-            s = u_map[u]
+        s = u_map[u]
+        if s is not None:
             # 只在设备起始 U 位显示信息
-            if u == s.get("u_start", 0):
-                h = s.get("u_height", 1)
+            if u == (s.u_start or 0):
+                h = s.u_height
                 label = f"{u}-{u + h - 1}U" if h > 1 else f"{u}U"
-                print(f"{label:>5s}  {s.get('status', ''):<6s}  "
-                      f"{s.get('asset_id', ''):<14s}  "
-                      f"{s.get('hostname', ''):<20s}  "
-                      f"{s.get('model', '')}")
+                print(_RACK_ROW(label, *_RACK_GET(s)))
         else:
             print(f"{u:>3d}U  {'--空--'}")
 
-    used = len(set(u_map.keys()))
+    used = sum(1 for s in u_map if s is not None)
     print(f"\n利用率: {used}/{max_u} U ({used / max_u * 100:.1f}%)")
 
 
-def cmd_warranty(days=90):
+def cmd_warranty(days=90, limit=None):
     """质保到期预警。"""
-    servers = fetch_warranty_expiring(days=days)
-    print(f"=== 未来 {days} 天内质保到期 ({len(servers)} 台) ===\n")
-    if not servers:
+    servers = fetch_warranty_expiring(days=days, fields=WARRANTY_FIELDS, limit=limit)
+    print(f"=== 未来 {days} 天内质保到期 ===\n")
+    total = _write_lines(_warranty_row(*_WARRANTY_GET(Server.from_record(s))) for s in servers)
+    if not total:
         print("  无即将过保设备")
         return
-    for s in servers:
-        expire = s.get("warranty_expire", "?")
-        print(f"  {s.get('asset_id', ''):<14s}  "
-              f"{s.get('hostname', ''):<20s}  "
-              f"过保: {expire}  "
-              f"合同: {s.get('vendor_contract', 'N/A')}")
+    print(f"\n共 {total} 台")
 
 
-def cmd_search(keyword):
+def cmd_search(keyword, local=False):
     """模糊搜索服务器。"""
-    servers = search_servers(keyword)
+    servers = _mirror.search(keyword) if local else search_servers(keyword)
     print(f"=== 搜索 '{keyword}' — {len(servers)} 条结果 ===\n")
-    _print_server_table(servers)
-
+    _print_server_table([Server.from_record(s) for s in servers])
+
+
+def cmd_lifecycle(asset_ids):
+    """服务器生命周期查看，支持一次查询多台。"""
+    # 设备信息与事件记录互不依赖，并发请求
+    if len(asset_ids) == 1:
+        asset_id = asset_ids[0]
+        server, events = _gather(
+            (fetch_server_by_id, asset_id),
+            (fetch_lifecycle_events, asset_id),
+        )
+        if not server:
+            print(f"未找到资产: {asset_id}", file=sys.stderr)
+            sys.exit(1)
+        _print_lifecycle(asset_id, Server.from_record(server), events)
+        return
 
-def cmd_lifecycle(asset_id):
-    """单台服务器生命周期查看。"""
-    server = fetch_server_by_id(asset_id)
-    if not server:
-        print(f"未找到资产: {asset_id}", file=sys.stderr)
+    # 多台：批量接口各一次请求，而不是 2N 次单台查询
+    servers, events = _gather(
+        (fetch_servers_bulk, asset_ids),
+        (fetch_lifecycle_bulk, asset_ids),
+    )
+    missing = []
+    for asset_id in asset_ids:
+        server = servers.get(asset_id)
+        if not server:
+            missing.append(asset_id)
+            continue
+        _print_lifecycle(asset_id, Server.from_record(server), events.get(asset_id, []))
+        print()
+    if missing:
+        print(f"未找到资产: {', '.join(missing)}", file=sys.stderr)
         sys.exit(1)
 
+
+def _print_lifecycle(asset_id, server, events):
+    """打印单台服务器信息及生命周期事件。"""
     print(f"=== 资产 {asset_id} 生命周期 ===\n")
-    print(f"  主机名:   {server.get('hostname', '')}")
-    print(f"  型号:     {server.get('model', '')}")
-    print(f"  SN:       {server.get('sn', '')}")
-    print(f"  状态:     {server.get('status', '')}")
-    print(f"  位置:     {server.get('dc_name', '')} / {server.get('rack_id', '')} / U{server.get('u_start', '')}")
-    print(f"  责任人:   {server.get('asset_owner', '')}")
-    print(f"  部门:     {server.get('business_unit', '')}")
+    print(f"  主机名:   {server.hostname}")
+    print(f"  型号:     {server.model}")
+    print(f"  SN:       {server.sn}")
+    print(f"  状态:     {server.status}")
+    print(f"  位置:     {server.dc_name} / {server.rack_id} / U{server.u_start}")
+    print(f"  责任人:   {server.asset_owner}")
+    print(f"  部门:     {server.business_unit}")
     print()
 
-    events = fetch_lifecycle_events(asset_id)
     if events:
         print("--- 事件记录 ---")
         for e in events:
@@ -285,100 +463,208 @@ def cmd_lifecycle(asset_id):
                   f"{e.get('detail', '')}")
 
 
+def cmd_sync():
+    """把数据源全量服务器同步到本地 Parquet 镜像（绕过查询缓存）。"""
+    total = _mirror.sync(fetch_all_servers.__wrapped__())
+    print(f"已同步 {total} 台服务器到 {_mirror.MIRROR_PATH}")
+
+
 def _print_server_table(servers):
-    """打印服务器列表表格。"""
-    if not servers:
+    """打印服务器列表表格，servers 可以是惰性迭代器。"""
+    servers = iter(servers)
+    first = next(servers, None)
+    if first is None:
         print("  无记录")
         return
-    print(f"  {'资产编号':<14s}  {'主机名':<20s}  {'型号':<20s}  {'状态':<8s}  {'位置'}")
-    print("  " + "-" * 80)
-    for s in servers:
-        loc = f"{s.get('dc_name', '')} {s.get('rack_id', '')} U{s.get('u_start', '')}"
-        print(f"  {s.get('asset_id', ''):<14s}  "
-              f"{s.get('hostname', ''):<20s}  "
-              f"{s.get('model', ''):<20s}  "
-              f"{s.get('status', ''):<8s}  "
-              f"{loc}")
+    header = [
+        f"  {'资产编号':<14s}  {'主机名':<20s}  {'型号':<20s}  {'状态':<8s}  {'位置'}",
+        "  " + "-" * 80,
+    ]
+    rows = (_TABLE_ROW(*_TABLE_GET(s)) for s in itertools.chain([first], servers))
+    _write_lines(itertools.chain(header, rows))
+
+
+def _warranty_row(asset_id, hostname, expire, contract):
+    """质保行：到期日 / 合同号为空时显示 ? / N/A。"""
+    return _WARRANTY_ROW(asset_id, hostname, expire or "?", contract or "N/A")
+
+
+def _write_lines(lines, batch=1000):
+    """
+    按批输出多行，每批一次 write，代替逐行 print 的加锁 / 系统调用开销。
+
+    lines 可以是惰性迭代器，内存中最多保留一批；返回输出的行数。
+    """
+    lines = iter(lines)
+    count = 0
+    for chunk in iter(lambda: list(itertools.islice(lines, batch)), []):
+        sys.stdout.write("\n".join(chunk))
+        sys.stdout.write("\n")
+        count += len(chunk)
+    return count
+
+
+def _write_json(rows):
+    """
+    以缩进 JSON 数组流式输出 rows（可为惰性迭代器），格式同 json.dumps(list, indent=2)。
+
+    逐条编码、按批写出，内存只占一批；安装了 orjson 时用其编码，否则回退标准库 json。
+    """
+    dumps = _json_dumps()
+
+    def lines():
+        it = iter(rows)
+        first = next(it, None)
+        if first is None:
+            yield "[]"
+            return
+        yield "["
+        prev = "  " + dumps(first).replace("\n", "\n  ")
+        for row in it:
+            yield prev + ","
+            prev = "  " + dumps(row).replace("\n", "\n  ")
+        yield prev
+        yield "]"
+
+    _write_lines(lines())
+
+
+def _json_dumps():
+    """返回单条记录的缩进 JSON 编码函数：优先 orjson，回退标准库 json。"""
+    try:
+        import orjson
+    except ImportError:
+        return functools.partial(json.dumps, indent=2, ensure_ascii=False, default=str)
+    option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    return lambda obj: orjson.dumps(obj, option=option, default=str).decode()
+
+
+class _Counted:
+    """迭代时顺带计数，用于流式输出结束后报告总条数。"""
+
+    __slots__ = ("_items", "count")
+
+    def __init__(self, items):
+        self._items = items
+        self.count = 0
+
+    def __iter__(self):
+        for item in self._items:
+            self.count += 1
+            yield item
+
+
+def _count_by(servers, dims):
+    """
+    按多个维度分组计数，返回 {维度: Counter}，缺失、None 或空串均计为 unknown。
+
+    servers 可以是惰性迭代器：按 COUNT_BATCH_SIZE 条一批 Counter.update，内存只占一批。
+    """
+    servers = iter(servers)
+    counts = {d: Counter() for d in dims}
+    batches = iter(lambda: list(itertools.islice(servers, COUNT_BATCH_SIZE)), [])
+    for batch in batches:
+        for d in dims:
+            counts[d].update(s.get(d) or "unknown" for s in batch)
+    return counts
+
+
+def _gather(*calls):
+    """
+    并发执行互不依赖的数据源调用，按传入顺序返回结果。
+
+    每个调用写作 (函数, 参数...)；任一调用抛出的异常会原样抛给调用方。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(len(calls), MAX_CONCURRENCY)) as pool:
+        futures = [pool.submit(fn, *args) for fn, *args in calls]
+        return [f.result() for f in futures]
 
 
 # ============================================================
 # CLI
 # ============================================================
 
-USAGE = """\
-数据中心服务器资产查询工具
+def build_parser():
+    """构建命令行解析器。"""
+    # --no-cache / --refresh 在子命令前后均可使用；SUPPRESS 避免子解析器默认值覆盖主解析器已解析的值
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--no-cache", action="store_true", default=argparse.SUPPRESS,
+                        help="跳过查询缓存，直接访问数据源（默认缓存 5 分钟）")
+    common.add_argument("--refresh", action="store_true", default=argparse.SUPPRESS,
+                        help="丢弃已有缓存，重新拉取并写入缓存")
+
+    parser = argparse.ArgumentParser(
+        prog="asset_query.py",
+        description="数据中心服务器资产查询工具",
+        epilog="注意: 数据源接口尚未实现，需对接实际 CMDB / 数据库 / API 后使用。",
+        parents=[common],
+    )
+    sub = parser.add_subparsers(dest="cmd", metavar="<命令>")
 
-用法:
-    python asset_query.py inventory [--dc 数据中心] [--status 状态] [--format json|csv|table]
-    python asset_query.py summary   [--dc 数据中心]
-    python asset_query.py rack      <机柜编号>
-    python asset_query.py warranty  [--days 天数]
-    python asset_query.py search    <关键词>
-    python asset_query.py lifecycle <资产编号>
-
-命令:
-    inventory   资产清单查询
-    summary     资产统计摘要（按状态/型号/数据中心）
-    rack        机柜视图（U 位分布）
-    warranty    质保到期预警
-    search      模糊搜索（资产编号 / 序列号 / 主机名 / IP）
-    lifecycle   单台设备生命周期
-
-注意: 数据源接口尚未实现，需对接实际 CMDB / 数据库 / API 后使用。
-"""
+    p = sub.add_parser("inventory", parents=[common], help="资产清单查询")
+    p.add_argument("--dc", metavar="数据中心")
+    p.add_argument("--status", metavar="状态")
+    p.add_argument("--format", default="table", choices=["json", "csv", "table"])
+    p.add_argument("--local", action="store_true", help="从本地镜像查询（先执行 sync）")
+
+    p = sub.add_parser("summary", parents=[common], help="资产统计摘要（按状态/型号/数据中心）")
+    p.add_argument("--dc", metavar="数据中心")
+    p.add_argument("--local", action="store_true", help="从本地镜像查询（先执行 sync）")
 
+    p = sub.add_parser("rack", parents=[common], help="机柜视图（U 位分布）")
+    p.add_argument("rack_id", metavar="机柜编号")
 
-def _parse_arg(args, flag, default=None):
-    """简易参数解析，提取 --flag value 格式的参数。"""
-    if flag in args:
-        idx = args.index(flag)
-        if idx + 1 < len(args):
-            return args[idx + 1]
-    return default
+    p = sub.add_parser("warranty", parents=[common], help="质保到期预警")
+    p.add_argument("--days", type=int, default=90, metavar="天数")
+    p.add_argument("--limit", type=int, metavar="条数")
+
+    p = sub.add_parser("search", parents=[common], help="模糊搜索（资产编号 / 序列号 / 主机名 / IP）")
+    p.add_argument("keyword", metavar="关键词")
+    p.add_argument("--local", action="store_true", help="从本地镜像查询（先执行 sync）")
+
+    p = sub.add_parser("lifecycle", parents=[common], help="设备生命周期（可一次查询多台）")
+    p.add_argument("asset_ids", nargs="+", metavar="资产编号")
+
+    sub.add_parser("sync", parents=[common], help="同步全量服务器到本地 Parquet 镜像（供 --local 使用）")
+
+    return parser
 
 
 def main():
-    args = sys.argv[1:]
-    if not args or args[0] in ("-h", "--help"):
-        print(USAGE)
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.cmd is None:
+        parser.print_help()
         sys.exit(0)
 
-    cmd = args[0]
+    if getattr(args, "no_cache", False):
+        _cache.disable()
+    elif getattr(args, "refresh", False):
+        _cache.clear_all()
 
     try:
-        if cmd == "inventory":
-            dc = _parse_arg(args, "--dc")
-            status = _parse_arg(args, "--status")
-            fmt = _parse_arg(args, "--format", "table")
-            cmd_inventory(dc_name=dc, status=status, fmt=fmt)
-        elif cmd == "summary":
-            dc = _parse_arg(args, "--dc")
-            cmd_summary(dc_name=dc)
-        elif cmd == "rack":
-            if len(args) < 2:
-                print("错误: 请提供机柜编号 rack_id", file=sys.stderr)
-                sys.exit(1)
-            cmd_rack(args[1])
-        elif cmd == "warranty":
-            days = int(_parse_arg(args, "--days", "90"))
-            cmd_warranty(days=days)
-        elif cmd == "search":
-            if len(args) < 2:
-                print("错误: 请提供搜索关键词", file=sys.stderr)
-                sys.exit(1)
-            cmd_search(args[1])
-        elif cmd == "lifecycle":
-            if len(args) < 2:
-                print("错误: 请提供资产编号 asset_id", file=sys.stderr)
-                sys.exit(1)
-            cmd_lifecycle(args[1])
-        else:
-            print(f"未知命令: {cmd}\n", file=sys.stderr)
-            print(USAGE)
-            sys.exit(1)
+        if args.cmd == "inventory":
+            cmd_inventory(dc_name=args.dc, status=args.status, fmt=args.format, local=args.local)
+        elif args.cmd == "summary":
+            cmd_summary(dc_name=args.dc, local=args.local)
+        elif args.cmd == "rack":
+            cmd_rack(args.rack_id)
+        elif args.cmd == "warranty":
+            cmd_warranty(days=args.days, limit=args.limit)
+        elif args.cmd == "search":
+            cmd_search(args.keyword, local=args.local)
+        elif args.cmd == "lifecycle":
+            cmd_lifecycle(args.asset_ids)
+        elif args.cmd == "sync":
+            cmd_sync()
     except NotImplementedError as e:
         print(f"[数据源未对接] {e}", file=sys.stderr)
         sys.exit(1)
+    except _mirror.MirrorError as e:
+        print(f"[本地镜像] {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -7,23 +7,32 @@ and output key information as JSON or human-readable text summary.
 
 Dependencies:
     pip install pyotdr
+    pip install orjson   # optional, faster JSON output
 
 Usage:
     python sor_parser.py <file.sor>              # Text summary
     python sor_parser.py <file.sor> --json        # JSON output
     python sor_parser.py <file.sor> --json --pretty  # Pretty-printed JSON
+    python sor_parser.py --batch <dir> --json        # All *.sor in dir, NDJSON
 """
 
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
-    from pyotdr import sorparse
+    from pyotdr import cksum, fxdparams, genparams, keyevents, mapblock, parts, supparams
 except ImportError:
     print("Error: pyotdr is required. Install with: pip install pyotdr", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson  # optional, much faster JSON output
+except ImportError:
+    orjson = None
+
 
 # --- Constants ---
 
@@ -44,16 +53,29 @@ BUILD_CONDITIONS = {
     "OT": "other",
 }
 
+# pyotdr block parsers; DataPts is handled by _read_datapts_header, other blocks are read through undecoded
+BLOCK_PARSERS = {
+    "GenParams": genparams.process,
+    "SupParams": supparams.process,
+    "FxdParams": fxdparams.process,
+    "KeyEvents": keyevents.process,
+    "Cksum": cksum.process,
+}
+
 
 def parse_sor(filepath: str) -> dict:
-    """Parse a SOR file via pyotdr and return a cleaned-up result dict."""
-    status, results, tracedata = sorparse(filepath)
+    """
+    Parse a SOR file via pyotdr and return a cleaned-up result dict.
+
+    Only the DataPts header is read; the trace itself is never decoded.
+    """
+    status, results, size = _sorparse(filepath)
     if status != "ok":
         raise RuntimeError(f"pyotdr parse failed: {status}")
 
     output = {
-        "filename": Path(filepath).name,
-        "file_size_bytes": Path(filepath).stat().st_size,
+        "filename": results["filename"],
+        "file_size_bytes": size,
     }
 
     # Block list
@@ -145,15 +167,89 @@ def parse_sor(filepath: str) -> dict:
         }
 
     # Trace data summary (count only)
-    if tracedata:
+    num_points = results.get("DataPts", {}).get("num data points")
+    if num_points:
         output["trace_data"] = {
-            "num_points": len(tracedata),
-            "note": "Trace data parsed but not included in output for brevity",
+            "num_points": num_points,
+            "note": "Point count from the DataPts header; trace data not decoded or included",
         }
 
     return output
 
 
+def parse_many(paths, workers: int = None):
+    """
+    Parse many SOR files in parallel worker processes, yielding results in input order.
+
+    workers defaults to the number of CPUs available to this process. A file that
+    fails to parse yields {"filename": ..., "error": ...} instead of stopping the batch.
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    workers = max(1, min(workers, len(paths)))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        yield from ex.map(_parse_or_error, paths, chunksize=8)
+
+
+def _parse_or_error(filepath: str) -> dict:
+    try:
+        return parse_sor(filepath)
+    except Exception as e:
+        return {"filename": Path(filepath).name, "error": str(e)}
+
+
+def _sorparse(filepath: str):
+    """
+    Block loop of pyotdr.sorparse(), without decoding the trace.
+
+    pyotdr's datapts.process() turns every point into a formatted string, which
+    dominates parse time on large traces; only the point count is needed here.
+    Returns (status, results, file size); the size comes from fstat on the open file.
+    """
+    f = open(filepath, "rb")
+    fh = parts.FH(f)
+    size = os.fstat(f.fileno()).st_size
+    results = {"filename": os.path.basename(filepath)}
+    try:
+        status = mapblock.process(fh, results)
+        if status != "ok":
+            return status, results, size
+
+        blocks = results["blocks"]
+        for bname in sorted(blocks, key=lambda b: blocks[b]["order"]):
+            if bname == "DataPts":
+                status = _read_datapts_header(fh, results)
+            elif bname in BLOCK_PARSERS:
+                status = BLOCK_PARSERS[bname](fh, results)
+            else:
+                status = parts.slurp(fh, bname, results)
+            if status != "ok":
+                break
+    finally:
+        fh.close()
+    return status, results, size
+
+
+def _read_datapts_header(fh, results) -> str:
+    """
+    Read the DataPts point/trace counts and read through the rest of the block.
+
+    The block is read rather than seeked past because pyotdr computes the Cksum
+    over every byte read in file order.
+    """
+    ref = results["blocks"]["DataPts"]
+    fh.seek(ref["pos"])
+    if results["format"] == 2 and fh.read(8) != b"DataPts\0":
+        return "DataPts: incorrect header"
+    results["DataPts"] = {
+        "num data points": parts.get_uint(fh, 4),
+        "num traces": parts.get_signed(fh, 2),
+    }
+    fh.read(ref["pos"] + ref["size"] - fh.tell())
+    return "ok"
+
+
 # --- Output Formatting ---
 
 def print_summary(parsed: dict):
@@ -249,41 +345,77 @@ def _unit(value, unit: str):
     return None
 
 
+def _dumps(obj, pretty: bool = False) -> str:
+    """Serialize to JSON with orjson when installed, else the stdlib json module."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option, default=str).decode()
+    return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False, default=str)
+
+
 # --- CLI ---
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python sor_parser.py <file.sor> [--json] [--pretty]")
+        print("       python sor_parser.py --batch <dir> [--json]")
         print()
         print("Options:")
-        print("  --json     Output as JSON")
-        print("  --pretty   Pretty-print JSON (implies --json)")
+        print("  --batch <dir>   Parse every .sor file in <dir> in parallel (JSON: one object per line)")
+        print("  --json          Output as JSON")
+        print("  --pretty        Pretty-print JSON (implies --json)")
         print()
         print("Requires: pip install pyotdr")
         sys.exit(1)
 
-    filepath = sys.argv[1]
     output_json = "--json" in sys.argv
     pretty = "--pretty" in sys.argv
     if pretty:
         output_json = True
 
-    if not Path(filepath).exists():
-        print(f"Error: file not found: {filepath}", file=sys.stderr)
-        sys.exit(1)
+    if "--batch" in sys.argv:
+        i = sys.argv.index("--batch") + 1
+        if i >= len(sys.argv) or not Path(sys.argv[i]).is_dir():
+            print("Error: --batch requires a directory", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(_main_batch(sys.argv[i], output_json))
+
+    filepath = sys.argv[1]
 
     try:
         parsed = parse_sor(filepath)
+    except FileNotFoundError:
+        print(f"Error: file not found: {filepath}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"Error parsing SOR file: {e}", file=sys.stderr)
         sys.exit(1)
 
     if output_json:
-        indent = 2 if pretty else None
-        print(json.dumps(parsed, indent=indent, ensure_ascii=False, default=str))
+        print(_dumps(parsed, pretty))
     else:
         print_summary(parsed)
 
 
+def _main_batch(dirpath: str, output_json: bool) -> int:
+    """Parse every .sor file in dirpath; returns the exit code (1 if any file failed)."""
+    paths = sorted(str(p) for p in Path(dirpath).iterdir() if p.suffix.lower() == ".sor")
+    failed = 0
+    for parsed in parse_many(paths):
+        if "error" in parsed:
+            failed += 1
+            print(f"Error parsing SOR file {parsed['filename']}: {parsed['error']}", file=sys.stderr)
+            continue
+        if output_json:
+            # NDJSON: one compact object per line, whatever --pretty says
+            print(_dumps(parsed))
+        else:
+            print_summary(parsed)
+    print(f"{len(paths) - failed}/{len(paths)} files parsed", file=sys.stderr)
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
     main()